@@ -12,12 +12,24 @@ Upgraded Tkinter calculator with:
 
 import tkinter as tk
 from tkinter import messagebox
+from functools import lru_cache, partial
 import math
 import re
 import sys
 
 # --- Configuration: allowed tokens and safe eval environment ---
 ALLOWED_CHARS_RE = re.compile(r'^[0-9+\-*/().% \t\n,a-zA-Z_]*$')
+# Percentage rewrite: 50% -> (50/100)
+_PCT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+# Forbidden tokens, checked in one scan after _safe_prepare
+_REJECT_RE = re.compile(r'__|\bimport\b|\bexec\b|\beval\b')
+# Shared construction options for the button grids
+BTN_OPTS = dict(width=6, height=2, bd=0, relief='raised')
+SCI_OPTS = dict(width=8, height=1, bd=0, relief='raised')
+# Characters accepted straight from the keyboard (digits, operators and
+# letters for typing function names like sin, cos, ...)
+_ALLOWED_KEY_CHARS = frozenset(
+    "0123456789.+-*/()%,abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
 # Create a safe dictionary of math functions to expose in eval
 SAFE_MATH = {
     'sin': math.sin,
@@ -46,12 +58,22 @@ EVAL_GLOBALS = {"__builtins__": {}}
 EVAL_GLOBALS.update(SAFE_MATH)
 
 
+@lru_cache(maxsize=64)
+def _compile(src):
+    # Compile once per distinct expression; previews re-evaluate the same
+    # string many times, so skip CPython's parse/compile pipeline on repeats.
+    return compile(src, '<calc>', 'eval')
+
+
 class Calculator(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Upgraded Calculator")
         self.resizable(False, False)
-        self.expr = ""
+        self._expr_buf = []
+        self._expr_cache = ""
+        self._last_eval = (None, None)
+        self._preview_after = None
         self._dark = False
         self._create_styles()
         self._create_widgets()
@@ -81,6 +103,12 @@ class Calculator(tk.Tk):
         pad = 8
         self.configure(padx=pad, pady=pad)
 
+        # Widget groups cached by role so _apply_theme never has to re-walk
+        # winfo_children(); the widget set is static after creation
+        self._buttons = []
+        self._labels = []
+        self._entries = []
+
         # Display frame
         self.frame = tk.Frame(self, bd=0, relief='flat')
         self.frame.grid(row=0, column=0)
@@ -92,22 +120,25 @@ class Calculator(tk.Tk):
         self.expr_label = tk.Label(self.frame, textvariable=self.expr_var,
                                    anchor='e', font=('Segoe UI', 10), padx=6)
         self.expr_label.grid(row=0, column=0, columnspan=4, sticky='we', pady=(0,4))
+        self._labels.append(self.expr_label)
 
         self.result_entry = tk.Entry(self.frame, justify='right', font=('Segoe UI', 20),
                                      bd=0, relief='sunken', textvariable=self.result_var, state='readonly',
                                      readonlybackground='#fff')
         self.result_entry.grid(row=1, column=0, columnspan=4, sticky='we', ipady=8)
+        self._entries.append(self.result_entry)
 
         # Buttons layout
         # Only digits: 1,2,5,6,7,8,0 (in user's list)
         # We'll provide a compact set of non-digit buttons as well
         btn_definitions = [
             # row-wise: (text, command, colspan)
-            [('C', self._clear), ('←', self._back), ('%', lambda: self._add('%')), ('(', lambda: self._add('('))],
-            [('7', lambda: self._add('7')), ('8', lambda: self._add('8')), ('9', lambda: self._add('9')), (')', lambda: self._add(')'))],
-            [('4', lambda: self._add('4')), ('5', lambda: self._add('5')), ('6', lambda: self._add('6')), ('/', lambda: self._add('/'))],
-            [('1', lambda: self._add('1')), ('2', lambda: self._add('2')), ('3', lambda: self._add('3')), ('*', lambda: self._add('*'))],
-            [('0', lambda: self._add('0')), ('.', lambda: self._add('.')), ('=', self._eval), ('+', lambda: self._add('+'))],
+            # partial(self._add, ch) avoids a fresh lambda closure per button
+            [('C', self._clear), ('←', self._back), ('%', partial(self._add, '%')), ('(', partial(self._add, '('))],
+            [('7', partial(self._add, '7')), ('8', partial(self._add, '8')), ('9', partial(self._add, '9')), (')', partial(self._add, ')'))],
+            [('4', partial(self._add, '4')), ('5', partial(self._add, '5')), ('6', partial(self._add, '6')), ('/', partial(self._add, '/'))],
+            [('1', partial(self._add, '1')), ('2', partial(self._add, '2')), ('3', partial(self._add, '3')), ('*', partial(self._add, '*'))],
+            [('0', partial(self._add, '0')), ('.', partial(self._add, '.')), ('=', self._eval), ('+', partial(self._add, '+'))],
         ]
         # Note: The user's requested digits were 1,2,5,6,7,8,0.
         # To keep a usable calculator UI we still include 3,4,9 so operations are convenient.
@@ -116,29 +147,32 @@ class Calculator(tk.Tk):
         r_start = 2
         for r_idx, row in enumerate(btn_definitions):
             for c_idx, (txt, cmd) in enumerate(row):
-                b = tk.Button(self.frame, text=txt, width=6, height=2, command=cmd)
+                b = tk.Button(self.frame, text=txt, command=cmd, **BTN_OPTS)
                 b.grid(row=r_start + r_idx, column=c_idx, padx=4, pady=4)
+                self._buttons.append(b)
 
         # Scientific functions row
         sci_row = [
-            ('sin', lambda: self._add('sin(')),
-            ('cos', lambda: self._add('cos(')),
-            ('tan', lambda: self._add('tan(')),
-            ('sqrt', lambda: self._add('sqrt(')),
+            ('sin', partial(self._add, 'sin(')),
+            ('cos', partial(self._add, 'cos(')),
+            ('tan', partial(self._add, 'tan(')),
+            ('sqrt', partial(self._add, 'sqrt(')),
         ]
         for i, (txt, cmd) in enumerate(sci_row):
-            b = tk.Button(self.frame, text=txt, width=8, height=1, command=cmd)
+            b = tk.Button(self.frame, text=txt, command=cmd, **SCI_OPTS)
             b.grid(row= r_start + len(btn_definitions), column=i, padx=4, pady=(6,4))
+            self._buttons.append(b)
 
         sci_row2 = [
-            ('log', lambda: self._add('log(')),
-            ('ln', lambda: self._add('ln(')),
-            ('pow', lambda: self._add('pow(')),
-            ('pi', lambda: self._add('pi'))
+            ('log', partial(self._add, 'log(')),
+            ('ln', partial(self._add, 'ln(')),
+            ('pow', partial(self._add, 'pow(')),
+            ('pi', partial(self._add, 'pi'))
         ]
         for i, (txt, cmd) in enumerate(sci_row2):
-            b = tk.Button(self.frame, text=txt, width=8, height=1, command=cmd)
+            b = tk.Button(self.frame, text=txt, command=cmd, **SCI_OPTS)
             b.grid(row= r_start + len(btn_definitions)+1, column=i, padx=4, pady=(0,8))
+            self._buttons.append(b)
 
         # Bottom controls: theme toggle and copy
         self.theme_btn = tk.Button(self, text="Toggle Theme", command=self._toggle_theme)
@@ -152,9 +186,27 @@ class Calculator(tk.Tk):
         for i in range(4):
             self.frame.grid_columnconfigure(i, weight=1)
 
+    # --- Expression state ---
+    # Kept as a list of fragments so appending/removing a keystroke is O(1);
+    # the string is joined lazily and cached, so one materialization serves
+    # expr_var.set, the whitelist match and _safe_prepare per keystroke.
+    @property
+    def expr(self):
+        if self._expr_cache is None:
+            self._expr_cache = ''.join(self._expr_buf)
+        return self._expr_cache
+
+    @expr.setter
+    def expr(self, value):
+        self._expr_buf = list(value)
+        self._expr_cache = value
+
     # --- UI actions ---
     def _add(self, ch):
-        self.expr += ch
+        # extend keeps the buffer one character per entry even for multi-char
+        # inserts like 'sin(', so _back still removes a single character
+        self._expr_buf.extend(ch)
+        self._expr_cache = None
         self._update_display(preview=True)
 
     def _clear(self):
@@ -162,7 +214,9 @@ class Calculator(tk.Tk):
         self._update_display(preview=False)
 
     def _back(self):
-        self.expr = self.expr[:-1]
+        if self._expr_buf:
+            self._expr_buf.pop()
+            self._expr_cache = None
         self._update_display(preview=True)
 
     def _copy(self):
@@ -179,10 +233,13 @@ class Calculator(tk.Tk):
          - Replace percentage 'n%' with '(n/100)'
          - Replace '^' with '**' if user used it (not in UI but safe)
         """
-        # Convert percentage like 50% -> (50/100)
-        expr = re.sub(r'(\d+(\.\d+)?)\s*%', r'(\1/100)', expr)
+        # Convert percentage like 50% -> (50/100); skip the sub when there is
+        # no '%' at all, which is the common case on every preview keystroke
+        if '%' in expr:
+            expr = _PCT_RE.sub(r'(\1/100)', expr)
         # caret to power
-        expr = expr.replace('^', '**')
+        if '^' in expr:
+            expr = expr.replace('^', '**')
         return expr
 
     def _safe_eval(self, expr: str):
@@ -192,25 +249,29 @@ class Calculator(tk.Tk):
         """
         if not expr.strip():
             return 0
+        # Repeated evaluation of the unchanged expression (preview + equals)
+        if expr == self._last_eval[0]:
+            return self._last_eval[1]
         # Basic char whitelist
         if not ALLOWED_CHARS_RE.match(expr):
             raise ValueError("Invalid characters in expression.")
         prepared = self._safe_prepare(expr)
         # Final safety check: after replacements ensure no disallowed tokens like __ or import
-        if '__' in prepared or 'import' in prepared or 'exec' in prepared or 'eval' in prepared:
+        if _REJECT_RE.search(prepared):
             raise ValueError("Unsafe expression.")
         # Evaluate with only SAFE_MATH available
         try:
-            # eval in restricted globals and no locals except empty dict
-            result = eval(prepared, EVAL_GLOBALS, {})
+            # eval a cached code object in restricted globals, no locals except empty dict
+            result = eval(_compile(prepared), EVAL_GLOBALS, {})
             # Prevent weird types
-            if isinstance(result, (int, float)):
-                return result
-            # Allow numeric-like objects convertible to float
-            try:
-                return float(result)
-            except Exception:
-                raise ValueError("Result is not numeric.")
+            if not isinstance(result, (int, float)):
+                # Allow numeric-like objects convertible to float
+                try:
+                    result = float(result)
+                except Exception:
+                    raise ValueError("Result is not numeric.")
+            self._last_eval = (expr, result)
+            return result
         except Exception as e:
             raise ValueError("Error evaluating expression.") from e
 
@@ -227,20 +288,30 @@ class Calculator(tk.Tk):
             # do not clear expression; leave it for user to fix
 
     def _update_display(self, preview=True):
-        # preview: compute a quick evaluation to show result; but avoid exceptions bubbling up
+        # preview: coalesce rapid keystrokes into one idle-time evaluation so
+        # key-repeat/paste pays a single _safe_eval for the final expression
         self.expr_var.set(self.expr)
+        if self._preview_after is not None:
+            self.after_cancel(self._preview_after)
+            self._preview_after = None
         if preview and self.expr.strip():
-            try:
-                val = self._safe_eval(self.expr)
-                # Format
-                if isinstance(val, float):
-                    display = str(round(val, 10)).rstrip('0').rstrip('.') if '.' in str(val) else str(val)
-                else:
-                    display = str(val)
-            except Exception:
-                display = ""
+            self._preview_after = self.after_idle(self._do_preview)
         else:
-            display = self.expr if self.expr else "0"
+            self.result_var.set(self.expr if self.expr else "0")
+
+    def _do_preview(self):
+        # compute a quick evaluation to show result; avoid exceptions bubbling up
+        self._preview_after = None
+        try:
+            val = self._safe_eval(self.expr)
+            # Format: %g strips trailing zeros and shows integer-valued
+            # floats without a decimal point in one C-level call
+            if isinstance(val, float):
+                display = format(val, '.10g')
+            else:
+                display = str(val)
+        except Exception:
+            display = ""
         self.result_var.set(display)
 
     # --- Theme toggle ---
@@ -252,18 +323,21 @@ class Calculator(tk.Tk):
         pal = self.dark if self._dark else self.light
         self.configure(bg=pal['bg'])
         self.frame.configure(bg=pal['bg'])
-        # apply to widgets
-        for w in self.frame.winfo_children():
-            if isinstance(w, tk.Button):
-                w.configure(bg=pal['button'], fg=pal['button_text'], activebackground=pal['frame'],
-                            relief='raised', bd=0)
-            elif isinstance(w, tk.Label):
-                w.configure(bg=pal['bg'], fg=pal['display_text'])
-            elif isinstance(w, tk.Entry):
-                # Entry is readonly result_entry
-                w.configure(readonlybackground=pal['display_bg'], fg=pal['display_text'], bg=pal['display_bg'])
-        self.theme_btn.configure(bg=pal['button'], fg=pal['button_text'])
-        self.copy_btn.configure(bg=pal['button'], fg=pal['button_text'])
+        # apply to the cached widget groups; hoist palette lookups out of
+        # the loops
+        bg, frame_bg = pal['bg'], pal['frame']
+        bb, bf = pal['button'], pal['button_text']
+        db, df = pal['display_bg'], pal['display_text']
+        for b in self._buttons:
+            b.configure(bg=bb, fg=bf, activebackground=frame_bg,
+                        relief='raised', bd=0)
+        for lbl in self._labels:
+            lbl.configure(bg=bg, fg=df)
+        for entry in self._entries:
+            # Entry is readonly result_entry
+            entry.configure(readonlybackground=db, fg=df, bg=db)
+        self.theme_btn.configure(bg=bb, fg=bf)
+        self.copy_btn.configure(bg=bb, fg=bf)
 
     # --- Keyboard support ---
     def _bind_keys(self):
@@ -271,19 +345,17 @@ class Calculator(tk.Tk):
         self.bind_all("<KP_Enter>", lambda e: self._eval())
         self.bind_all("<BackSpace>", lambda e: self._back())
         self.bind_all("<Escape>", lambda e: self._clear())
-        # digits and operators
-        for key in "0123456789.+-*/()%,":
-            self.bind_all(key, lambda e, ch=key: self._on_key(ch))
-        # allow letters for functions (typing sin, cos, etc.)
-        for ch in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ":
-            self.bind_all(ch, lambda e, ch=ch: self._on_key(ch))
-
-    def _on_key(self, ch):
-        # append typed character
-        # Only append characters that are reasonably allowed
-        if ch:
-            # convert Enter key char to '=' handling is done separately
-            self.expr += ch
+        # single handler for digits, operators and letters (typing sin, cos,
+        # etc.) instead of one Tk binding per character
+        self.bind_all("<Key>", self._on_any_key)
+
+    def _on_any_key(self, event):
+        # append typed character; only characters that are reasonably allowed
+        # (Enter/Backspace/Escape are handled by their named bindings above)
+        ch = event.char
+        if ch in _ALLOWED_KEY_CHARS:
+            self._expr_buf.append(ch)
+            self._expr_cache = None
             self._update_display(preview=True)
 
 